@@ -1,4 +1,7 @@
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass
+from functools import cache, lru_cache
+from typing import NamedTuple
 
 CPU_MIN = 0.25
 CPU_MAX = 16.0
@@ -20,39 +23,74 @@ MEMORY_SIDECAR_MAX = 0.5
 CPU_MEMORY_SIDECAR_STEP = 0.05
 
 
-@dataclass
-class Resource:
+class Resource(NamedTuple):
     details: str
     cpu: float
     memory: float
 
 
+@dataclass(slots=True, frozen=True)
+class UtilizationResult:
+    cpu_total: float
+    memory_total: float
+    base: Resource
+    alt: Resource
+    surplus_cpu: float
+    surplus_memory: float
+    alt_surplus_cpu: float
+    alt_surplus_memory: float
+    cost_per_day: float
+    alt_cost_per_day: float
+
+    @property
+    def is_optimal(self) -> bool:
+        return self.surplus_cpu == 0 and self.surplus_memory == 0
+
+
 # Based on https://docs.aws.amazon.com/eks/latest/userguide/fargate-pod-configuration.html#fargate-cpu-and-memory
-RESOURCES_MAPS = [
-    {"details": "0.25 vCPU, 0.5 GB", "cpu": 0.25, "memory": 0.5},
-    {"details": "0.25 vCPU, 1 GB", "cpu": 0.25, "memory": 1},
-    {"details": "0.25 vCPU, 2 GB", "cpu": 0.25, "memory": 2},
-    {"details": "0.5 vCPU, 1 GB", "cpu": 0.5, "memory": 1},
-    {"details": "0.5 vCPU, 2 GB", "cpu": 0.5, "memory": 2},
-    {"details": "0.5 vCPU, 3 GB", "cpu": 0.5, "memory": 3},
-    {"details": "0.5 vCPU, 4 GB", "cpu": 0.5, "memory": 4},
+RESOURCES = [
+    Resource(details="0.25 vCPU, 0.5 GB", cpu=0.25, memory=0.5),
+    Resource(details="0.25 vCPU, 1 GB", cpu=0.25, memory=1),
+    Resource(details="0.25 vCPU, 2 GB", cpu=0.25, memory=2),
+    Resource(details="0.5 vCPU, 1 GB", cpu=0.5, memory=1),
+    Resource(details="0.5 vCPU, 2 GB", cpu=0.5, memory=2),
+    Resource(details="0.5 vCPU, 3 GB", cpu=0.5, memory=3),
+    Resource(details="0.5 vCPU, 4 GB", cpu=0.5, memory=4),
     # 1 vCPU: 2 to 8 GB in 1-GB increments
-    *[{"details": f"1 vCPU, {i} GB", "cpu": 1, "memory": i} for i in range(2, 9)],
+    *[Resource(details=f"1 vCPU, {i} GB", cpu=1, memory=i) for i in range(2, 9)],
     # 2 vCPU: 4 to 16 GB in 1-GB increments
-    *[{"details": f"2 vCPU, {i} GB", "cpu": 2, "memory": i} for i in range(4, 17)],
+    *[Resource(details=f"2 vCPU, {i} GB", cpu=2, memory=i) for i in range(4, 17)],
     # 4 vCPU: 8 to 30 GB in 1-GB increments
-    *[{"details": f"4 vCPU, {i} GB", "cpu": 4, "memory": i} for i in range(8, 31)],
+    *[Resource(details=f"4 vCPU, {i} GB", cpu=4, memory=i) for i in range(8, 31)],
     # 8 vCPU: 16 to 60 GB in 4-GB increments
-    *[{"details": f"8 vCPU, {i} GB", "cpu": 8, "memory": i} for i in range(16, 61, 4)],
+    *[Resource(details=f"8 vCPU, {i} GB", cpu=8, memory=i) for i in range(16, 61, 4)],
     # 16 vCPU: 32 to 120 GB in 8-GB increments
     *[
-        {"details": f"16 vCPU, {i} GB", "cpu": 16, "memory": i}
+        Resource(details=f"16 vCPU, {i} GB", cpu=16, memory=i)
         for i in range(32, 121, 8)
     ],
 ]
-RESOURCES = [Resource(**mapping) for mapping in RESOURCES_MAPS]
 
-RESOURCES_TABLE_MD = """\
+# RESOURCES is ordered by (cpu, memory): index it per cpu tier for binary search
+_CPU_TIERS = sorted({resource.cpu for resource in RESOURCES})
+_RESOURCES_BY_CPU = {
+    cpu: [resource for resource in RESOURCES if resource.cpu == cpu]
+    for cpu in _CPU_TIERS
+}
+_MEMORIES_BY_CPU = {
+    cpu: [resource.memory for resource in resources]
+    for cpu, resources in _RESOURCES_BY_CPU.items()
+}
+_MAX_CPU = RESOURCES[-1].cpu
+_MAX_MEMORY = max(resource.memory for resource in RESOURCES)
+_EXCEEDED_MAX_RESOURCES_MESSAGE = (
+    "Requested resources exceed the maximum available resources for Fargate."
+)
+
+
+@cache
+def resources_table_md() -> str:
+    return """\
 | vCPU value | Memory value                                      |
 |------------|---------------------------------------------------|
 | 0.25 vCPU  | 0.5 GB, 1 GB, 2 GB                                |
@@ -63,68 +101,77 @@ RESOURCES_TABLE_MD = """\
 | 8 vCPU     | Between 16 GB and 60 GB in 4-GB increments        |
 | 16 vCPU    | Between 32 GB and 120 GB in 8-GB increments       |
 """
+
+
 RESOURCES_TABLE_CAPTION = "Based on [AWS Docs Reference](https://docs.aws.amazon.com/eks/latest/userguide/fargate-pod-configuration.html#fargate-cpu-and-memory)"
 
 # Based on https://aws.amazon.com/fargate/pricing/ for Linux/x86 for Asia Pacific (Singapore) region
 PER_VCPU_COST_PER_HOUR = 0.05056
 PER_GB_COST_PER_HOUR = 0.00553
-FARGATE_PRICING_MD = f"""\
+_PER_DAY_VCPU = PER_VCPU_COST_PER_HOUR * 24
+_PER_DAY_GB = PER_GB_COST_PER_HOUR * 24
+
+
+@cache
+def fargate_pricing_md() -> str:
+    return f"""\
 | Resource            | Price                      |
 |---------------------|----------------------------|
-| per vCPU per hour   | \${PER_VCPU_COST_PER_HOUR} |
-| per GB per hour     | \${PER_GB_COST_PER_HOUR}   |
+| per vCPU per hour   | \\${PER_VCPU_COST_PER_HOUR} |
+| per GB per hour     | \\${PER_GB_COST_PER_HOUR}   |
 """
+
+
 FARGATE_PRICING_CAPTION = "Based on [AWS Fargate Pricing](https://aws.amazon.com/fargate/pricing/) for **Linux/x86, Asia Pacific (Singapore) region**"
 
 
-def get_resource(
-    total_cpu: float, total_memory: float, alt_tier: bool = False
-) -> Resource:
-    for resource in RESOURCES:
-        if resource.cpu >= total_cpu and resource.memory >= total_memory:
-            if alt_tier:
-                return get_alt_tier_resource(resource, total_cpu, total_memory)
-            return resource
+def get_resource(total_cpu: float, total_memory: float) -> Resource:
+    # written as a negation so NaN inputs are rejected too
+    if not (total_cpu <= _MAX_CPU and total_memory <= _MAX_MEMORY):
+        raise ValueError(_EXCEEDED_MAX_RESOURCES_MESSAGE)
+
+    return _find_resource(total_cpu, total_memory)
+
+
+@lru_cache(maxsize=512)
+def _find_resource(total_cpu: float, total_memory: float) -> Resource:
+    for cpu in _CPU_TIERS[bisect_left(_CPU_TIERS, total_cpu) :]:
+        memories = _MEMORIES_BY_CPU[cpu]
+        index = bisect_left(memories, total_memory)
+        if index < len(memories):
+            return _RESOURCES_BY_CPU[cpu][index]
 
-    raise ValueError(
-        "Requested resources exceed the maximum available resources for Fargate."
-    )
+    raise ValueError(_EXCEEDED_MAX_RESOURCES_MESSAGE)
 
 
+@lru_cache(maxsize=512)
 def get_alt_tier_resource(
     fargate_resource: Resource, total_cpu: float, total_memory: float
 ) -> Resource:
     # fargate cpu matches total cpu requested, minmax the memory
     if fargate_resource.cpu == total_cpu:
-        candidate_resources = [
-            resource
-            for resource in RESOURCES
-            if resource.cpu == total_cpu and resource.memory < total_memory
-        ]
+        index = bisect_left(_MEMORIES_BY_CPU[total_cpu], total_memory)
 
-        if candidate_resources:
-            return max(candidate_resources, key=lambda x: x.memory)
+        if index > 0:
+            return _RESOURCES_BY_CPU[total_cpu][index - 1]
 
     # fargate cpu more than total cpu requested, minmax the cpu followed by memory
     elif fargate_resource.cpu > total_cpu and fargate_resource.memory >= total_memory:
-        candidate_resources = [
-            resource for resource in RESOURCES if resource.cpu < fargate_resource.cpu
-        ]
+        tier_index = bisect_left(_CPU_TIERS, fargate_resource.cpu)
 
-        if candidate_resources:
-            lower_cpu = max(candidate_resources, key=lambda x: x.cpu).cpu
+        if tier_index > 0:
+            lower_cpu = _CPU_TIERS[tier_index - 1]
 
-            lower_candidate_resources = [
-                resource
-                for resource in RESOURCES
-                if resource.cpu == lower_cpu and -1 < resource.memory - total_memory < 1
-            ]
+            # memories within 1 GB of the request, i.e. in (total - 1, total + 1)
+            lower_memories = _MEMORIES_BY_CPU[lower_cpu]
+            low = bisect_right(lower_memories, total_memory - 1)
+            high = bisect_left(lower_memories, total_memory + 1)
 
-            if lower_candidate_resources:
-                return max(lower_candidate_resources, key=lambda x: x.memory)
+            if low < high:
+                return _RESOURCES_BY_CPU[lower_cpu][high - 1]
 
     return fargate_resource
 
 
 def get_cost_per_day(cpu: float, memory: float) -> float:
-    return (cpu * PER_VCPU_COST_PER_HOUR + memory * PER_GB_COST_PER_HOUR) * 24
+    return cpu * _PER_DAY_VCPU + memory * _PER_DAY_GB
@@ -1,14 +1,34 @@
-import pandas as pd
 import streamlit as st
 
 import fargate as fg
-from fargate import Resource
+from fargate import Resource, UtilizationResult
 
 TITLE = "AWS Fargate Calculator"
 PADDING_HEIGHT = 68
-
-
-st.set_page_config(page_title=TITLE, layout="wide", initial_sidebar_state="expanded")
+FARGATE_TIER_TEMPLATE = (
+    "Fargate tier {cpu:.2f} vCPU, {memory:.2f} GB [\\${cost:.2f}/day]"
+)
+OPTIMAL_VERDICT_TEMPLATE = (
+    "The resources requested and provisioned are optimal ✅  \n  - {fargate_tier}"
+)
+NOT_OPTIMAL_VERDICT_TEMPLATE = (
+    "The resources requested and provisioned are not optimal ⚠️  \n"
+    "Choose one of the following options:  \n"
+    "{option_1}"
+    "{option_2}"
+)
+OPTION_TEMPLATE = (
+    "- {fargate_tier} \n"
+    "   - **Set request for {cpu} vCPU, {memory} GB**  \n"
+    "   - {delta}\n"
+)
+# keyed by (cpu delta is nonzero, memory delta is nonzero)
+DELTA_TEMPLATES = {
+    (True, True): "{cpu:+.2f} vCPU, {memory:+.2f} GB",
+    (True, False): "{cpu:+.2f} vCPU",
+    (False, True): "{memory:+.2f} GB",
+    (False, False): "",
+}
 
 
 def calculate_resource_utilization(
@@ -17,146 +37,258 @@ def calculate_resource_utilization(
     memory_reserved_k8s: float,
     cpu_request_sidecar: float = 0.0,
     memory_request_sidecar: float = 0.0,
-) -> list[Resource]:
+) -> UtilizationResult:
     cpu_total = cpu_request_service + cpu_request_sidecar
     memory_total = memory_request_service + memory_reserved_k8s + memory_request_sidecar
 
     fargate_provision = fg.get_resource(cpu_total, memory_total)
-    cpu_surplus = fargate_provision.cpu - cpu_total
-    memory_surplus = fargate_provision.memory - memory_total
+    surplus_cpu = fargate_provision.cpu - cpu_total
+    surplus_memory = fargate_provision.memory - memory_total
 
-    alt_fargate_provision = fg.get_resource(cpu_total, memory_total, alt_tier=True)
-    alt_cpu_surplus = alt_fargate_provision.cpu - cpu_total
-    alt_memory_surplus = alt_fargate_provision.memory - memory_total
+    # an optimal provision is reported as is, so skip the alt tier lookup
+    if surplus_cpu == 0 and surplus_memory == 0:
+        alt_fargate_provision = fargate_provision
+    else:
+        alt_fargate_provision = fg.get_alt_tier_resource(
+            fargate_provision, cpu_total, memory_total
+        )
 
-    return [
-        Resource(details="Resources requested", cpu=cpu_total, memory=memory_total),
-        Resource(
-            details="Fargate resources tier provisioned",
-            cpu=fargate_provision.cpu,
-            memory=fargate_provision.memory,
-        ),
-        Resource(details="Resources surplus", cpu=cpu_surplus, memory=memory_surplus),
-        Resource(
-            details="Alt Fargate resources tier provisioned",
-            cpu=alt_fargate_provision.cpu,
-            memory=alt_fargate_provision.memory,
+    return UtilizationResult(
+        cpu_total=cpu_total,
+        memory_total=memory_total,
+        base=fargate_provision,
+        alt=alt_fargate_provision,
+        surplus_cpu=surplus_cpu,
+        surplus_memory=surplus_memory,
+        alt_surplus_cpu=alt_fargate_provision.cpu - cpu_total,
+        alt_surplus_memory=alt_fargate_provision.memory - memory_total,
+        cost_per_day=fg.get_cost_per_day(
+            fargate_provision.cpu, fargate_provision.memory
         ),
-        Resource(
-            details="Alt resources surplus",
-            cpu=alt_cpu_surplus,
-            memory=alt_memory_surplus,
+        alt_cost_per_day=fg.get_cost_per_day(
+            alt_fargate_provision.cpu, alt_fargate_provision.memory
         ),
-    ]
-
-
-def display_resource_table(provision_result: list[Resource]):
-    result_df = pd.DataFrame(provision_result)
-    result_df["value"] = result_df.apply(
-        lambda x: f"{x['cpu']:.2f} vCPU, {x['memory']:.2f} GB", axis=1
     )
 
-    surplus_resources = provision_result[2]
-    if surplus_resources.cpu > 0 or surplus_resources.memory > 0:
-        result_df.loc[2, "value"] = (
-            f"{surplus_resources.cpu:.2f} vCPU, {surplus_resources.memory:.2f} GB ⚠️"
-        )
-    else:
-        result_df.loc[2, "value"] = (
-            f"{surplus_resources.cpu:.2f} vCPU, {surplus_resources.memory:.2f} GB ✅"
-        )
 
-    result_display_df = result_df.drop(["cpu", "memory"], axis=1)
-    result_display_df = result_display_df[:3]
-    st.dataframe(result_display_df, width="stretch", hide_index=True)
+def build_resource_table(provision_result: UtilizationResult) -> str:
+    fargate_provision = provision_result.base
+    surplus_status = "✅" if provision_result.is_optimal else "⚠️"
+
+    return (
+        "| Details | Value |\n"
+        "|---|---|\n"
+        f"| Resources requested | {provision_result.cpu_total:.2f} vCPU, {provision_result.memory_total:.2f} GB |\n"
+        f"| Fargate resources tier provisioned | {fargate_provision.cpu:.2f} vCPU, {fargate_provision.memory:.2f} GB |\n"
+        f"| Resources surplus | {provision_result.surplus_cpu:.2f} vCPU, {provision_result.surplus_memory:.2f} GB {surplus_status} |\n"
+    )
 
 
 def evaluate_resource_provision(
     cpu_request_service: float,
     memory_request_service: float,
-    provision_result: list[Resource],
-):
-    (
-        _,
-        fargate_provision,
-        surplus_resources,
-        alt_fargate_provision,
-        alt_surplus_resources,
-    ) = provision_result
-
-    if surplus_resources.cpu == 0 and surplus_resources.memory == 0:
-        fargate_cost_per_day = fg.get_cost_per_day(
-            fargate_provision.cpu, fargate_provision.memory
-        )
-        fargate_tier = rf"Fargate tier {fargate_provision.cpu:.2f} vCPU, {fargate_provision.memory:.2f} GB [\${fargate_cost_per_day:.2f}/day]"
-        st.success(
-            f"The resources requested and provisioned are optimal ✅  \n  - {fargate_tier}"
+    provision_result: UtilizationResult,
+) -> str:
+    fargate_provision = provision_result.base
+
+    if provision_result.is_optimal:
+        fargate_tier = FARGATE_TIER_TEMPLATE.format(
+            cpu=fargate_provision.cpu,
+            memory=fargate_provision.memory,
+            cost=provision_result.cost_per_day,
         )
+        return OPTIMAL_VERDICT_TEMPLATE.format(fargate_tier=fargate_tier)
+
+    option_1 = derive_optimal_request_options(
+        cpu_request_service=cpu_request_service,
+        memory_request_service=memory_request_service,
+        fargate_provision=fargate_provision,
+        fargate_cost_per_day=provision_result.cost_per_day,
+        surplus_cpu=provision_result.surplus_cpu,
+        surplus_memory=provision_result.surplus_memory,
+    )
+    # same tier means same surplus, so the second option would be a duplicate
+    if provision_result.alt == fargate_provision:
+        option_2 = ""
     else:
-        option_1 = derive_optimal_request_options(
-            cpu_request_service=cpu_request_service,
-            memory_request_service=memory_request_service,
-            fargate_provision=fargate_provision,
-            surplus_resources=surplus_resources,
-        )
         option_2 = derive_optimal_request_options(
             cpu_request_service=cpu_request_service,
             memory_request_service=memory_request_service,
-            fargate_provision=alt_fargate_provision,
-            surplus_resources=alt_surplus_resources,
+            fargate_provision=provision_result.alt,
+            fargate_cost_per_day=provision_result.alt_cost_per_day,
+            surplus_cpu=provision_result.alt_surplus_cpu,
+            surplus_memory=provision_result.alt_surplus_memory,
         )
 
-        if option_1 == option_2:
-            option_2 = ""
-
-        st.warning(
-            "The resources requested and provisioned are not optimal ⚠️  \n"
-            "Choose one of the following options:  \n"
-            f"{option_1}"
-            f"{option_2}"
-        )
+    return NOT_OPTIMAL_VERDICT_TEMPLATE.format(option_1=option_1, option_2=option_2)
 
 
 def derive_optimal_request_options(
     cpu_request_service: float,
     memory_request_service: float,
     fargate_provision: Resource,
-    surplus_resources: Resource,
+    fargate_cost_per_day: float,
+    surplus_cpu: float,
+    surplus_memory: float,
 ):
-    optimal_cpu_request = cpu_request_service + surplus_resources.cpu
-    optimal_memory_request = memory_request_service + surplus_resources.memory
-    fargate_cost_per_day = fg.get_cost_per_day(
-        fargate_provision.cpu, fargate_provision.memory
+    optimal_cpu_request = cpu_request_service + surplus_cpu
+    optimal_memory_request = memory_request_service + surplus_memory
+    fargate_tier = FARGATE_TIER_TEMPLATE.format(
+        cpu=fargate_provision.cpu,
+        memory=fargate_provision.memory,
+        cost=fargate_cost_per_day,
     )
-    fargate_tier = rf"Fargate tier {fargate_provision.cpu:.2f} vCPU, {fargate_provision.memory:.2f} GB [\${fargate_cost_per_day:.2f}/day]"
 
     delta_cpu = optimal_cpu_request - cpu_request_service
     delta_memory = optimal_memory_request - memory_request_service
 
-    deltas = []
-    if delta_cpu != 0:
-        deltas.append(f"{'+' if delta_cpu > 0 else ''}{delta_cpu:.2f} vCPU")
-    if delta_memory != 0:
-        deltas.append(f"{'+' if delta_memory > 0 else ''}{delta_memory:.2f} GB")
-    delta = ", ".join(deltas)
+    delta = DELTA_TEMPLATES[delta_cpu != 0, delta_memory != 0].format(
+        cpu=delta_cpu, memory=delta_memory
+    )
 
-    return (
-        f"- {fargate_tier} \n"
-        f"   - **Set request for {optimal_cpu_request} vCPU, {optimal_memory_request} GB**  \n"
-        f"   - {delta}\n"
+    return OPTION_TEMPLATE.format(
+        fargate_tier=fargate_tier,
+        cpu=optimal_cpu_request,
+        memory=optimal_memory_request,
+        delta=delta,
     )
 
 
+@st.cache_data(max_entries=128, show_spinner=False)
+def compute_for_inputs(
+    cpu_request_service: float,
+    memory_request_service: float,
+    memory_reserved_k8s: float,
+    cpu_request_sidecar: float = 0.0,
+    memory_request_sidecar: float = 0.0,
+) -> tuple[UtilizationResult, str, str]:
+    provision_result = calculate_resource_utilization(
+        cpu_request_service=cpu_request_service,
+        memory_request_service=memory_request_service,
+        memory_reserved_k8s=memory_reserved_k8s,
+        cpu_request_sidecar=cpu_request_sidecar,
+        memory_request_sidecar=memory_request_sidecar,
+    )
+    table_md = build_resource_table(provision_result)
+    verdict_md = evaluate_resource_provision(
+        cpu_request_service, memory_request_service, provision_result
+    )
+    return provision_result, table_md, verdict_md
+
+
+def display_resource_provision(
+    provision_result: UtilizationResult, table_md: str, verdict_md: str
+):
+    st.markdown(table_md)
+    if provision_result.is_optimal:
+        st.success(verdict_md)
+    else:
+        st.warning(verdict_md)
+
+
+# the sidecar toggle stays outside: it drives the main area, so it needs full reruns
+@st.fragment
+def render_sidebar_references():
+    if st.toggle("Show Fargate tiers"):
+        st.markdown(fg.resources_table_md())
+        st.caption(fg.RESOURCES_TABLE_CAPTION)
+    if st.toggle("Show Fargate pricing"):
+        st.markdown(fg.fargate_pricing_md())
+        st.caption(fg.FARGATE_PRICING_CAPTION)
+
+
+def render_tile(
+    prefix: str, show_sidecar: bool, cpu_default: float, memory_default: float
+) -> tuple[float, float]:
+    st.subheader("With sidecar" if show_sidecar else "Default")
+    left_col, right_col = st.columns(2)
+
+    cpu_reserved_sidecar = 0.0
+    memory_reserved_sidecar = 0.0
+
+    with left_col:
+        cpu_request_service = st.number_input(
+            label="CPU request (service)",
+            value=cpu_default,
+            min_value=fg.CPU_MIN,
+            max_value=fg.CPU_MAX,
+            step=fg.CPU_MEMORY_STEP,
+            key=f"{prefix}_cpu_request_service",
+        )
+        st.number_input(
+            label="CPU reserved (k8s components)",
+            value=fg.CPU_RESERVED_DEFAULT,
+            min_value=fg.CPU_RESERVED_DEFAULT,
+            max_value=fg.CPU_RESERVED_DEFAULT,
+            key=f"{prefix}_cpu_reserved_k8s",
+        )
+        if show_sidecar:
+            cpu_reserved_sidecar = st.number_input(
+                label="CPU reserved (sidecar)",
+                value=fg.CPU_SIDECAR_DEFAULT,
+                min_value=fg.CPU_SIDECAR_MIN,
+                max_value=fg.CPU_SIDECAR_MAX,
+                step=fg.CPU_MEMORY_SIDECAR_STEP,
+                key=f"{prefix}_cpu_reserved_sidecar",
+            )
+    with right_col:
+        memory_request_service = st.number_input(
+            label="Memory request (service)",
+            value=memory_default,
+            min_value=fg.MEMORY_MIN,
+            max_value=fg.MEMORY_MAX,
+            step=fg.CPU_MEMORY_STEP,
+            key=f"{prefix}_memory_request_service",
+        )
+        memory_reserved_k8s = st.number_input(
+            label="Memory reserved (k8s components)",
+            value=fg.MEMORY_RESERVED_DEFAULT,
+            min_value=fg.MEMORY_RESERVED_DEFAULT,
+            max_value=fg.MEMORY_RESERVED_DEFAULT,
+            key=f"{prefix}_memory_reserved_k8s",
+        )
+        if show_sidecar:
+            memory_reserved_sidecar = st.number_input(
+                label="Memory reserved (sidecar)",
+                value=fg.MEMORY_SIDECAR_DEFAULT,
+                min_value=fg.MEMORY_SIDECAR_MIN,
+                max_value=fg.MEMORY_SIDECAR_MAX,
+                step=fg.CPU_MEMORY_SIDECAR_STEP,
+                key=f"{prefix}_memory_reserved_sidecar",
+            )
+
+    if not show_sidecar:
+        # fill the height of the sidecar inputs so both tiles' results line up
+        st.container(height=PADDING_HEIGHT, border=False)
+
+    try:
+        display_resource_provision(
+            *compute_for_inputs(
+                cpu_request_service=cpu_request_service,
+                memory_request_service=memory_request_service,
+                memory_reserved_k8s=memory_reserved_k8s,
+                cpu_request_sidecar=cpu_reserved_sidecar,
+                memory_request_sidecar=memory_reserved_sidecar,
+            )
+        )
+    except ValueError as exc:
+        st.error(str(exc))
+
+    return cpu_request_service, memory_request_service
+
+
+# the default tile feeds the sidecar tile's defaults, so only the sidecar is isolated
+render_tile_fragment = st.fragment(render_tile)
+
+
 def main():
+    st.set_page_config(
+        page_title=TITLE, layout="wide", initial_sidebar_state="expanded"
+    )
     st.header(TITLE)
 
     with st.sidebar:
-        if st.toggle("Show Fargate tiers"):
-            st.markdown(fg.RESOURCES_TABLE_MD)
-            st.caption(fg.RESOURCES_TABLE_CAPTION)
-        if st.toggle("Show Fargate pricing"):
-            st.markdown(fg.FARGATE_PRICING_MD)
-            st.caption(fg.FARGATE_PRICING_CAPTION)
+        render_sidebar_references()
         show_sidecar_config = st.toggle("Enable comparison with sidecar", value=True)
 
     default_col, sidecar_col = st.columns(2)
@@ -164,126 +296,15 @@ def main():
     sidecar_tile = sidecar_col.container(border=True)
 
     with default_tile:
-        default_tile.subheader("Default")
-        default_left_col, default_right_col = st.columns(2)
-
-        with default_left_col:
-            cpu_request_service = st.number_input(
-                label="CPU request (service)",
-                value=fg.CPU_SERVICE_DEFAULT,
-                min_value=fg.CPU_MIN,
-                max_value=fg.CPU_MAX,
-                step=fg.CPU_MEMORY_STEP,
-                key="cpu_request_service",
-            )
-            st.number_input(
-                label="CPU reserved (k8s components)",
-                value=fg.CPU_RESERVED_DEFAULT,
-                min_value=fg.CPU_RESERVED_DEFAULT,
-                max_value=fg.CPU_RESERVED_DEFAULT,
-                key="cpu_reserved_k8s",
-            )
-        with default_right_col:
-            memory_request_service = st.number_input(
-                label="Memory request (service)",
-                value=fg.MEMORY_SERVICE_DEFAULT,
-                min_value=fg.MEMORY_MIN,
-                max_value=fg.MEMORY_MAX,
-                step=fg.CPU_MEMORY_STEP,
-                key="memory_request_service",
-            )
-            memory_reserved_k8s = st.number_input(
-                label="Memory reserved (k8s components)",
-                value=fg.MEMORY_RESERVED_DEFAULT,
-                min_value=fg.MEMORY_RESERVED_DEFAULT,
-                max_value=fg.MEMORY_RESERVED_DEFAULT,
-                key="memory_reserved_k8s",
-            )
-
-        st.container(height=PADDING_HEIGHT, border=False)
-        try:
-            result_default = calculate_resource_utilization(
-                cpu_request_service=cpu_request_service,
-                memory_request_service=memory_request_service,
-                memory_reserved_k8s=memory_reserved_k8s,
-            )
-            display_resource_table(result_default)
-            evaluate_resource_provision(
-                cpu_request_service, memory_request_service, result_default
-            )
-        except ValueError as exc:
-            st.error(str(exc))
+        cpu_request_service, memory_request_service = render_tile(
+            "default", False, fg.CPU_SERVICE_DEFAULT, fg.MEMORY_SERVICE_DEFAULT
+        )
 
     if show_sidecar_config:
-        sidecar_tile.subheader("With sidecar")
-
         with sidecar_tile:
-            sidecar_left_col, sidecar_right_col = st.columns(2)
-            with sidecar_left_col:
-                cpu_request_service_new = st.number_input(
-                    label="CPU request (service)",
-                    value=cpu_request_service,
-                    min_value=fg.CPU_MIN,
-                    max_value=fg.CPU_MAX,
-                    step=fg.CPU_MEMORY_STEP,
-                    key="cpu_request_service_new",
-                )
-                st.number_input(
-                    label="CPU reserved (k8s components)",
-                    value=fg.CPU_RESERVED_DEFAULT,
-                    min_value=fg.CPU_RESERVED_DEFAULT,
-                    max_value=fg.CPU_RESERVED_DEFAULT,
-                    key="cpu_reserved_k8s_new",
-                )
-                cpu_reserved_sidecar = st.number_input(
-                    label="CPU reserved (sidecar)",
-                    value=fg.CPU_SIDECAR_DEFAULT,
-                    min_value=fg.CPU_SIDECAR_MIN,
-                    max_value=fg.CPU_SIDECAR_MAX,
-                    step=fg.CPU_MEMORY_SIDECAR_STEP,
-                    key="cpu_reserved_sidecar",
-                )
-            with sidecar_right_col:
-                memory_request_service_new = st.number_input(
-                    label="Memory request (service)",
-                    value=memory_request_service,
-                    min_value=fg.MEMORY_MIN,
-                    max_value=fg.MEMORY_MAX,
-                    step=fg.CPU_MEMORY_STEP,
-                    key="memory_request_service_new",
-                )
-                memory_reserved_k8s_new = st.number_input(
-                    label="Memory reserved (k8s components)",
-                    value=fg.MEMORY_RESERVED_DEFAULT,
-                    min_value=fg.MEMORY_RESERVED_DEFAULT,
-                    max_value=fg.MEMORY_RESERVED_DEFAULT,
-                    key="memory_reserved_k8s_new",
-                )
-                memory_reserved_sidecar = st.number_input(
-                    label="Memory reserved (sidecar)",
-                    value=fg.MEMORY_SIDECAR_DEFAULT,
-                    min_value=fg.MEMORY_SIDECAR_MIN,
-                    max_value=fg.MEMORY_SIDECAR_MAX,
-                    step=fg.CPU_MEMORY_SIDECAR_STEP,
-                    key="memory_reserved_sidecar",
-                )
-
-            try:
-                result_with_sidecar = calculate_resource_utilization(
-                    cpu_request_service=cpu_request_service_new,
-                    memory_request_service=memory_request_service_new,
-                    memory_reserved_k8s=memory_reserved_k8s_new,
-                    cpu_request_sidecar=cpu_reserved_sidecar,
-                    memory_request_sidecar=memory_reserved_sidecar,
-                )
-                display_resource_table(result_with_sidecar)
-                evaluate_resource_provision(
-                    cpu_request_service_new,
-                    memory_request_service_new,
-                    result_with_sidecar,
-                )
-            except ValueError as exc:
-                st.error(str(exc))
+            render_tile_fragment(
+                "sidecar", True, cpu_request_service, memory_request_service
+            )
 
 
 if __name__ == "__main__":